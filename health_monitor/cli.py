@@ -1,21 +1,28 @@
+import csv
+import functools
+import sys
 import threading
 import click
 from datetime import datetime, timezone, date
-from rich.console import Console
-from rich.table import Table
-from rich import box
 
-from .db import init_db, insert_event, query_events
+from .db import insert_event, insert_events, query_events
 
-console = Console()
+# rich is imported on first output so `hm --help` stays cheap
+_CONSOLE = None
 
 TAGS = ["food", "activity", "symptom", "mood", "stress", "sleep", "other"]
+TAG_CHOICES = click.Choice(TAGS)
+
+# Bars for symptom scores 0–10, built once
+_SCORE_BARS = tuple("█" * round(s / 2) + "░" * (5 - round(s / 2)) for s in range(11))
+
+# Above this many rows `hm list` skips the rich table and prints plain TSV
+_PLAIN_LIST_LIMIT = 200
 
 
 @click.group()
 def main():
     """Health event tracker. Log what you eat, do, and feel."""
-    init_db()
 
 
 # ---------------------------------------------------------------------------
@@ -23,7 +30,7 @@ def main():
 # ---------------------------------------------------------------------------
 
 @main.command()
-@click.argument("tag", type=click.Choice(TAGS))
+@click.argument("tag", type=TAG_CHOICES)
 @click.argument("value")
 @click.option("--category", "-c", default=None, help="Category (e.g. regular, junk)")
 @click.option("--notes", "-n", default=None, help="Extra notes")
@@ -38,6 +45,7 @@ def log(tag, value, category, notes):
       hm log mood relaxed
       hm log stress 7
     """
+    console = _console()
     event_id = insert_event(tag=tag, category=category, value=value, notes=notes)
     console.print(f"[green]✓[/green] Logged [bold]{tag}[/bold] → {value}"
                   + (f"  [dim]({category})[/dim]" if category else "")
@@ -60,6 +68,7 @@ def symptom(symptom, score, notes):
       hm symptom face_redness 6
       hm symptom face_redness 3 --notes "after breakfast"
     """
+    console = _console()
     event_id = insert_event(
         tag="symptom",
         category=symptom,
@@ -75,21 +84,34 @@ def symptom(symptom, score, notes):
 # ---------------------------------------------------------------------------
 
 @main.command("list")
-@click.option("--tag", "-t", default=None, type=click.Choice(TAGS + [None]), help="Filter by tag")
+@click.option("--tag", "-t", default=None, type=TAG_CHOICES, required=False, help="Filter by tag")
 @click.option("--today", is_flag=True, help="Only show today's events")
+@click.option("--source", "-s", default=None, help="Filter by source (cli, voice)")
 @click.option("--limit", "-l", default=20, show_default=True)
-def list_events(tag, today, limit):
+def list_events(tag, today, source, limit):
     """List recent events."""
+    console = _console()
     since = None
     if today:
         since = date.today().isoformat()
 
-    rows = query_events(tag=tag, since=since, limit=limit)
+    rows = query_events(tag=tag, since=since, limit=limit, source=source)
 
     if not rows:
         console.print("[dim]No events found.[/dim]")
         return
 
+    if len(rows) > _PLAIN_LIST_LIMIT:
+        # excel-tab quotes fields that contain tabs or newlines
+        csv.writer(sys.stdout, dialect="excel-tab", lineterminator="\n").writerows(
+            (ts, tag, category or "", value or "", notes or "")
+            for ts, tag, category, value, notes in rows
+        )
+        return
+
+    from rich import box
+    from rich.table import Table
+
     table = Table(box=box.SIMPLE_HEAVY, show_header=True, header_style="bold cyan")
     table.add_column("Time", style="dim", width=19)
     table.add_column("Tag", width=10)
@@ -97,20 +119,16 @@ def list_events(tag, today, limit):
     table.add_column("Value", width=20)
     table.add_column("Notes")
 
-    for row in rows:
-        ts = _fmt_ts(row["timestamp"])
-        value = row["value"] or ""
-        if row["tag"] == "symptom":
-            try:
-                value = f"{value}/10  {_score_bar(int(value))}"
-            except (ValueError, TypeError):
-                pass
+    for ts, row_tag, category, value, notes in rows:
+        value = value or ""
+        if row_tag == "symptom" and value.isdecimal() and int(value) <= 10:
+            value = f"{value}/10  {_SCORE_BARS[int(value)]}"
         table.add_row(
-            ts,
-            _tag_color(row["tag"]),
-            row["category"] or "",
+            _fmt_ts(ts),
+            _tag_color(row_tag),
+            category or "",
             value,
-            row["notes"] or "",
+            notes or "",
         )
 
     console.print(table)
@@ -124,6 +142,7 @@ def list_events(tag, today, limit):
 @main.command()
 def today():
     """Summary of today's events."""
+    console = _console()
     since = date.today().isoformat()
     rows = query_events(since=since, limit=200)
 
@@ -132,17 +151,24 @@ def today():
         return
 
     by_tag: dict[str, list] = {}
-    for row in rows:
-        by_tag.setdefault(row["tag"], []).append(row)
+    for _, tag, category, value, notes in rows:
+        by_tag.setdefault(tag, []).append((category, value, notes))
 
-    console.print(f"\n[bold]Today — {date.today()}[/bold]\n")
+    from rich.text import Text
+
+    # Assemble everything into one Text so rich renders (and writes) once
+    out = Text.assemble("\n", (f"Today — {date.today()}", "bold"), "\n\n")
     for tag, events in sorted(by_tag.items()):
-        console.print(f"  [bold cyan]{tag}[/bold cyan]")
-        for e in events:
-            val = e["value"] or ""
-            cat = f"[dim]{e['category']}[/dim]  " if e["category"] else ""
-            console.print(f"    {cat}{val}" + (f"  [dim italic]{e['notes']}[/dim italic]" if e["notes"] else ""))
-    console.print()
+        out.append("  ").append(tag, style="bold cyan").append("\n")
+        for category, value, notes in events:
+            out.append("    ")
+            if category:
+                out.append(category, style="dim").append("  ")
+            out.append(value or "")
+            if notes:
+                out.append("  ").append(notes, style="dim italic")
+            out.append("\n")
+    console.print(out)
 
 
 # ---------------------------------------------------------------------------
@@ -152,17 +178,21 @@ def today():
 @main.command()
 @click.option("--lang", "-l", default=None, help="Language hint: en, pl, … (default: auto-detect)")
 @click.option("--text", "-t", default=None, help="Skip recording and parse this text directly")
-def voice(lang, text):
+@click.option("--model", "-m", default=None,
+              help="Whisper model: tiny, base, small, … (default: $HM_WHISPER_MODEL or tiny)")
+def voice(lang, text, model):
     """Record voice and log events automatically.
 
     \b
     Examples:
       hm voice
       hm voice --lang pl
+      hm voice --model base
       hm voice --text "ate avocado and egg, redness is 6 today"
     """
+    console = _console()
     try:
-        from .voice import record_audio, transcribe, parse_events
+        from .voice import is_silent, load_model, record_audio, transcribe, parse_events
     except ImportError:
         console.print("[red]Voice deps missing.[/red] Run: pip install -e '.[voice]'")
         return
@@ -174,24 +204,27 @@ def voice(lang, text):
         stop = threading.Event()
         console.print("[bold]Recording…[/bold]  Press [bold]Enter[/bold] to stop.")
 
+        # load Whisper while the user is still talking
+        threading.Thread(target=load_model, args=(model,), daemon=True).start()
+
         # run recording in background; block main thread waiting for Enter
         audio_holder = {}
 
         def _rec():
-            audio_holder["path"] = record_audio(stop)
+            audio_holder["audio"] = record_audio(stop)
 
         rec_thread = threading.Thread(target=_rec, daemon=True)
         rec_thread.start()
         input()          # blocks until user presses Enter
         stop.set()
         rec_thread.join()
-        audio_path = audio_holder["path"]
+        audio = audio_holder["audio"]
+        if is_silent(audio):
+            console.print("[yellow]Recording too short or silent. Try again.[/yellow]")
+            return
 
         console.print("[dim]Transcribing…[/dim]")
-        try:
-            transcript = transcribe(audio_path, language=lang)
-        finally:
-            audio_path.unlink(missing_ok=True)
+        transcript = transcribe(audio, language=lang, model=model)
 
         if not transcript:
             console.print("[yellow]Nothing transcribed. Try again.[/yellow]")
@@ -212,6 +245,9 @@ def voice(lang, text):
         return
 
     # -- preview & confirm ---------------------------------------------------
+    from rich import box
+    from rich.table import Table
+
     table = Table(box=box.SIMPLE_HEAVY, header_style="bold cyan", show_header=True)
     table.add_column("#", width=3)
     table.add_column("Tag", width=10)
@@ -234,14 +270,7 @@ def voice(lang, text):
         return
 
     # -- insert --------------------------------------------------------------
-    for ev in events:
-        insert_event(
-            tag=ev.get("tag", "other"),
-            category=ev.get("category"),
-            value=ev.get("value"),
-            notes=ev.get("notes"),
-            source="voice",
-        )
+    insert_events(events, source="voice")
     console.print(f"[green]✓[/green] Logged {len(events)} event(s).")
 
 
@@ -249,9 +278,16 @@ def voice(lang, text):
 # Helpers
 # ---------------------------------------------------------------------------
 
+def _console():
+    global _CONSOLE
+    if _CONSOLE is None:
+        from rich.console import Console
+        _CONSOLE = Console()
+    return _CONSOLE
+
+
 def _score_bar(score: int) -> str:
-    filled = round(score / 2)
-    return "█" * filled + "░" * (5 - filled)
+    return _SCORE_BARS[score]
 
 
 def _fmt_ts(ts: str) -> str:
@@ -262,13 +298,19 @@ def _fmt_ts(ts: str) -> str:
         return ts[:16]
 
 
-def _tag_color(tag: str) -> str:
-    colors = {
-        "food":     "[green]food[/green]",
-        "symptom":  "[red]symptom[/red]",
-        "activity": "[blue]activity[/blue]",
-        "mood":     "[yellow]mood[/yellow]",
-        "stress":   "[magenta]stress[/magenta]",
-        "sleep":    "[cyan]sleep[/cyan]",
-    }
-    return colors.get(tag, tag)
+_TAG_STYLES = {
+    "food":     "green",
+    "symptom":  "red",
+    "activity": "blue",
+    "mood":     "yellow",
+    "stress":   "magenta",
+    "sleep":    "cyan",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _tag_color(tag: str):
+    """Styled rich Text for a tag; built once per tag, so tables skip markup parsing."""
+    from rich.text import Text
+
+    return Text(tag or "", style=_TAG_STYLES.get(tag, ""))
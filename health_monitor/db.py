@@ -1,3 +1,4 @@
+import atexit
 import sqlite3
 from pathlib import Path
 from datetime import datetime, timezone
@@ -5,42 +6,97 @@ from typing import Optional
 
 DB_PATH = Path(__file__).parent.parent / "data" / "health.db"
 
+# One connection per process, opened on first use and closed at exit
+_CONN: Optional[sqlite3.Connection] = None
+
+# Bump when _init_schema changes; stored in PRAGMA user_version so an
+# up-to-date database skips schema setup entirely
+_SCHEMA_VERSION = 1
+
 
 def get_conn() -> sqlite3.Connection:
-    DB_PATH.parent.mkdir(exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    global _CONN
+    if _CONN is None:
+        DB_PATH.parent.mkdir(exist_ok=True)
+        # autocommit; multi-statement writes use explicit BEGIN/COMMIT
+        _CONN = sqlite3.connect(DB_PATH, isolation_level=None)
+        _CONN.execute("PRAGMA journal_mode=WAL")
+        _CONN.execute("PRAGMA synchronous=NORMAL")
+        _CONN.execute("PRAGMA temp_store=MEMORY")
+        atexit.register(_CONN.close)
+        _init_schema(_CONN)
+    return _CONN
 
 
 def init_db() -> None:
-    with get_conn() as conn:
-        conn.executescript("""
-            CREATE TABLE IF NOT EXISTS events (
-                id        INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT    NOT NULL,
-                tag       TEXT    NOT NULL,
-                category  TEXT,
-                value     TEXT,
-                notes     TEXT,
-                source    TEXT    NOT NULL DEFAULT 'cli'
-            );
-
-            CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events(timestamp);
-            CREATE INDEX IF NOT EXISTS idx_events_tag       ON events(tag);
-
-            CREATE TABLE IF NOT EXISTS garmin_daily (
-                day             TEXT PRIMARY KEY,
-                steps           INTEGER,
-                rhr_avg         REAL,
-                hr_avg          REAL,
-                stress_avg      INTEGER,
-                sleep_total_sec INTEGER,
-                sleep_rem_sec   INTEGER,
-                calories_active INTEGER,
-                synced_at       TEXT NOT NULL
-            );
-        """)
+    """Open the database, creating the schema if needed (get_conn does this lazily)."""
+    get_conn()
+
+
+def _init_schema(conn: sqlite3.Connection) -> None:
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= _SCHEMA_VERSION:
+        return
+
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS events (
+            id        INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT    NOT NULL,
+            tag       TEXT    NOT NULL,
+            category  TEXT,
+            value     TEXT,
+            notes     TEXT,
+            source    TEXT    NOT NULL DEFAULT 'cli',
+            ts_epoch  INTEGER
+        );
+
+        CREATE TABLE IF NOT EXISTS garmin_daily (
+            day             TEXT PRIMARY KEY,
+            steps           INTEGER,
+            rhr_avg         REAL,
+            hr_avg          REAL,
+            stress_avg      INTEGER,
+            sleep_total_sec INTEGER,
+            sleep_rem_sec   INTEGER,
+            calories_active INTEGER,
+            synced_at       TEXT NOT NULL
+        );
+    """)
+
+    # ts_epoch: unix seconds of `timestamp`, so range filters compare integers
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(events)")}
+    if "ts_epoch" not in columns:
+        conn.execute("ALTER TABLE events ADD COLUMN ts_epoch INTEGER")
+
+    conn.executescript("""
+        CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events(timestamp);
+        -- (ts_epoch, timestamp) is query_events' sort key, so every index below
+        -- serves its filter + ORDER BY without a sort
+        CREATE INDEX IF NOT EXISTS idx_events_epoch_ts  ON events(ts_epoch, timestamp);
+        CREATE INDEX IF NOT EXISTS idx_events_source_epoch_ts
+            ON events(source, ts_epoch, timestamp);
+        -- the trailing columns make tag queries covering (no table lookups);
+        -- it also serves plain tag lookups, so the single-column tag index goes
+        CREATE INDEX IF NOT EXISTS idx_events_tag_cover
+            ON events(tag, ts_epoch, timestamp, category, value, notes);
+        DROP INDEX IF EXISTS idx_events_tag;
+    """)
+
+    # Backfill rows written before ts_epoch existed with the same _epoch()
+    # rule used on insert; unparseable legacy timestamps stay NULL
+    backfill = []
+    for row_id, ts in conn.execute("SELECT id, timestamp FROM events WHERE ts_epoch IS NULL"):
+        try:
+            backfill.append((_epoch(ts), row_id))
+        except ValueError:
+            pass
+    if backfill:
+        conn.execute("BEGIN")
+        conn.executemany("UPDATE events SET ts_epoch = ? WHERE id = ?", backfill)
+        conn.execute("COMMIT")
+
+    # Give the planner statistics for the new indexes
+    conn.execute("ANALYZE")
+    conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
 
 
 def insert_event(
@@ -52,18 +108,45 @@ def insert_event(
     timestamp: Optional[str] = None,
 ) -> int:
     ts = timestamp or datetime.now(timezone.utc).isoformat()
-    with get_conn() as conn:
-        cur = conn.execute(
-            "INSERT INTO events (timestamp, tag, category, value, notes, source) VALUES (?, ?, ?, ?, ?, ?)",
-            (ts, tag, category, value, notes, source),
+    cur = get_conn().execute(
+        "INSERT INTO events (timestamp, ts_epoch, tag, category, value, notes, source) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (ts, _epoch(ts), tag, category, value, notes, source),
+    )
+    return cur.lastrowid
+
+
+def insert_events(events: list[dict], source: str = "cli") -> None:
+    """Insert several events in a single transaction (one fsync for the batch)."""
+    ts = datetime.now(timezone.utc).isoformat()
+    epoch = _epoch(ts)
+    rows = [
+        (ts, epoch, ev.get("tag", "other"), ev.get("category"), ev.get("value"),
+         ev.get("notes"), source)
+        for ev in events
+    ]
+    conn = get_conn()
+    conn.execute("BEGIN")
+    try:
+        conn.executemany(
+            "INSERT INTO events (timestamp, ts_epoch, tag, category, value, notes, source) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
         )
-        return cur.lastrowid
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+# What the CLI displays; all of it lives in idx_events_tag_cover.
+# query_events returns plain tuples in this order.
+_EVENT_COLUMNS = "timestamp, tag, category, value, notes"
 
 
 def query_events(
     tag: Optional[str] = None,
     since: Optional[str] = None,
     limit: int = 50,
+    source: Optional[str] = None,
 ) -> list:
     clauses = []
     params: list = []
@@ -72,14 +155,27 @@ def query_events(
         clauses.append("tag = ?")
         params.append(tag)
     if since:
-        clauses.append("timestamp >= ?")
-        params.append(since)
+        clauses.append("ts_epoch >= ?")
+        params.append(_epoch(since))
+    if source:
+        clauses.append("source = ?")
+        params.append(source)
 
     where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
     params.append(limit)
 
-    with get_conn() as conn:
-        return conn.execute(
-            f"SELECT * FROM events {where} ORDER BY timestamp DESC LIMIT ?",
-            params,
-        ).fetchall()
+    return get_conn().execute(
+        f"SELECT {_EVENT_COLUMNS} FROM events {where} ORDER BY ts_epoch DESC, timestamp DESC LIMIT ?",
+        params,
+    ).fetchall()
+
+
+def _epoch(ts: str) -> int:
+    """
+    ISO 8601 timestamp or date → unix seconds (naive values are local time).
+    Raises ValueError for anything else, so `timestamp=` and `since` must be ISO.
+    """
+    try:
+        return int(datetime.fromisoformat(ts).timestamp())
+    except (TypeError, ValueError):
+        raise ValueError(f"expected an ISO 8601 timestamp or date, got {ts!r}") from None
@@ -1,12 +1,11 @@
 """
 Voice input pipeline:
   1. record_audio()  — capture mic input until Enter is pressed
-  2. transcribe()    — local Whisper model (faster-whisper, base model ~145 MB)
+  2. transcribe()    — local Whisper model (faster-whisper, tiny model ~75 MB by default)
   3. parse_events()  — Claude API turns transcribed text into structured events
 """
 
-import json
-import tempfile
+import os
 import threading
 from pathlib import Path
 from typing import List, Dict, Optional
@@ -14,18 +13,25 @@ from typing import List, Dict, Optional
 # Whisper model cached next to the package so it's not re-downloaded each run
 _WHISPER_CACHE = Path(__file__).parent.parent / ".whisper_cache"
 
+# tiny is plenty for short diary entries; set HM_WHISPER_MODEL=base (small, …) for accuracy
+_MODEL_NAME = os.environ.get("HM_WHISPER_MODEL", "tiny")
+
+# Loaded once per process and model name; see load_model()
+_MODELS: Dict[str, object] = {}
+_MODEL_LOCK = threading.Lock()
+
 
 # ---------------------------------------------------------------------------
 # Recording
 # ---------------------------------------------------------------------------
 
-def record_audio(stop_event: threading.Event, sample_rate: int = 16000) -> Path:
+def record_audio(stop_event: threading.Event, sample_rate: int = 16000):
     """
     Stream audio from the default microphone until stop_event is set.
-    Returns path to a temporary WAV file (caller must delete it).
+    Returns a mono float32 NumPy array, which faster-whisper takes directly
+    (it expects 16 kHz, the default here).
     """
     import sounddevice as sd
-    import soundfile as sf
     import numpy as np
 
     chunks: List = []
@@ -38,29 +44,67 @@ def record_audio(stop_event: threading.Event, sample_rate: int = 16000) -> Path:
                         callback=callback):
         stop_event.wait()
 
-    audio = np.concatenate(chunks, axis=0) if chunks else np.zeros((sample_rate,), dtype="float32")
-    tmp = Path(tempfile.mktemp(suffix=".wav"))
-    sf.write(tmp, audio, sample_rate)
-    return tmp
+    if not chunks:
+        return np.zeros((sample_rate,), dtype="float32")
+    return np.concatenate(chunks, axis=0).reshape(-1)
+
+
+def is_silent(audio, sample_rate: int = 16000,
+              min_seconds: float = 0.5, min_rms: float = 1e-3) -> bool:
+    """True if a recording is too short or too quiet to be worth transcribing."""
+    import numpy as np
+
+    if len(audio) < sample_rate * min_seconds:
+        return True
+    return float(np.sqrt(np.mean(np.square(audio)))) < min_rms
 
 
 # ---------------------------------------------------------------------------
 # Transcription
 # ---------------------------------------------------------------------------
 
-def transcribe(audio_path: Path, language: Optional[str] = None) -> str:
+def load_model(name: Optional[str] = None):
+    """
+    Return the process-wide WhisperModel `name` (default: HM_WHISPER_MODEL
+    or 'tiny'), loading it on first call.
+    Safe to call from a background thread to warm the model up early.
     """
-    Transcribe a WAV file with faster-whisper (runs locally, no API key needed).
-    Downloads the 'base' model (~145 MB) on first use into .whisper_cache/.
+    name = name or _MODEL_NAME
+    model = _MODELS.get(name)
+    if model is None:
+        with _MODEL_LOCK:
+            model = _MODELS.get(name)
+            if model is None:
+                from faster_whisper import WhisperModel
+
+                _WHISPER_CACHE.mkdir(exist_ok=True)
+                # int8 is already CTranslate2's fastest CPU path (float16 is GPU-only)
+                model = _MODELS[name] = WhisperModel(
+                    name, download_root=str(_WHISPER_CACHE),
+                    device="cpu", compute_type="int8",
+                    cpu_threads=max(1, (os.cpu_count() or 2) - 1),
+                    num_workers=1,
+                )
+    return model
+
+
+def transcribe(audio, language: Optional[str] = None,
+               model: Optional[str] = None) -> str:
+    """
+    Transcribe a 16 kHz float32 audio array (from record_audio) with
+    faster-whisper (runs locally, no API key needed).
+    Downloads the model ('tiny', ~75 MB, unless overridden) on first use into .whisper_cache/.
     Handles Polish and English well; leave language=None for auto-detect.
     """
-    from faster_whisper import WhisperModel
-
-    _WHISPER_CACHE.mkdir(exist_ok=True)
-    model = WhisperModel("base", download_root=str(_WHISPER_CACHE), device="cpu",
-                         compute_type="int8")
-    segments, _ = model.transcribe(str(audio_path), language=language,
-                                   vad_filter=True)
+    # Greedy decoding without cross-segment conditioning: diary entries are short
+    segments, _ = load_model(model).transcribe(
+        audio,
+        language=language,
+        beam_size=1,
+        condition_on_previous_text=False,
+        vad_filter=True,
+        vad_parameters=dict(min_silence_duration_ms=500),
+    )
     return " ".join(seg.text.strip() for seg in segments).strip()
 
 
@@ -103,12 +147,23 @@ Examples:
 """
 
 
+_CLIENT = None
+
+
+def _client():
+    """Shared Anthropic client, so repeat calls reuse its HTTP connection pool."""
+    global _CLIENT
+    if _CLIENT is None:
+        import anthropic
+        _CLIENT = anthropic.Anthropic()
+    return _CLIENT
+
+
 def parse_events(text: str) -> List[Dict]:
     """Call Claude to turn free text into a list of structured event dicts."""
-    import anthropic
+    import orjson
 
-    client = anthropic.Anthropic()
-    response = client.messages.create(
+    response = _client().messages.create(
         model="claude-haiku-4-5-20251001",
         max_tokens=1024,
         system=_SYSTEM_PROMPT,
@@ -118,10 +173,10 @@ def parse_events(text: str) -> List[Dict]:
 
     # Strip markdown code fences if Claude wrapped the JSON
     if raw.startswith("```"):
-        lines = raw.splitlines()
-        raw = "\n".join(lines[1:-1] if lines[-1].strip() == "```" else lines[1:])
+        nl = raw.find("\n")
+        raw = raw[nl + 1:].removesuffix("```").strip() if nl != -1 else ""
 
     if not raw:
         return []
 
-    return json.loads(raw)
+    return orjson.loads(raw)
@@ -9,6 +9,8 @@ Run manually or via cron:
     .venv/bin/python scripts/garmin_sync.py --days 90
 """
 
+import re
+import sys
 import sqlite3
 import argparse
 from pathlib import Path
@@ -25,151 +27,141 @@ HEALTH_DB = Path(__file__).parent.parent / "data" / "health.db"
 
 # --- helpers ----------------------------------------------------------------
 
+_TIME_RE = re.compile(r"(\d+):(\d+):(\d+)")
+
+
 def _time_str_to_seconds(t: str) -> int:
     """Convert 'HH:MM:SS.ffffff' or 'HH:MM:SS' to integer seconds."""
-    if not t:
-        return 0
-    try:
-        parts = t.split(".")[0].split(":")
-        h, m, s = int(parts[0]), int(parts[1]), int(parts[2])
-        return h * 3600 + m * 60 + s
-    except Exception:
+    m = _TIME_RE.match(t) if isinstance(t, str) else None
+    if not m:
         return 0
+    return int(m[1]) * 3600 + int(m[2]) * 60 + int(m[3])
 
 
-def _garmin_conn(path: Path) -> sqlite3.Connection:
+def _require(path: Path) -> Path:
     if not path.exists():
         raise FileNotFoundError(
             f"GarminDB file not found: {path}\n"
             "Run: garmindb_cli.py --all --download --import --analyze --latest"
         )
-    conn = sqlite3.connect(path)
-    conn.row_factory = sqlite3.Row
-    return conn
+    return path
 
 
 def _health_conn() -> sqlite3.Connection:
     HEALTH_DB.parent.mkdir(exist_ok=True)
     conn = sqlite3.connect(HEALTH_DB)
-    conn.row_factory = sqlite3.Row
+    conn.create_function("sleep_to_sec", 1, _time_str_to_seconds, deterministic=True)
     return conn
 
 
+# Prefer detailed sleep from garmin.db (gmain.sleep), fall back to summary avg
+_UPSERT_SQL = """
+    INSERT INTO garmin_daily
+        (day, steps, rhr_avg, hr_avg, stress_avg,
+         sleep_total_sec, sleep_rem_sec, calories_active, synced_at)
+    SELECT
+        s.day,
+        s.steps,
+        s.rhr_avg,
+        s.hr_avg,
+        s.stress_avg,
+        {sleep_total},
+        {sleep_rem},
+        s.calories_active_avg,
+        ?
+    FROM gsum.days_summary s
+    {join}
+    WHERE s.day >= ?
+    ON CONFLICT(day) DO UPDATE SET
+        steps           = excluded.steps,
+        rhr_avg         = excluded.rhr_avg,
+        hr_avg          = excluded.hr_avg,
+        stress_avg      = excluded.stress_avg,
+        sleep_total_sec = excluded.sleep_total_sec,
+        sleep_rem_sec   = excluded.sleep_rem_sec,
+        calories_active = excluded.calories_active,
+        synced_at       = excluded.synced_at
+"""
+
+
 # --- core sync --------------------------------------------------------------
 
 def sync(days: int = 30, verbose: bool = True) -> int:
     """
     Pull the last `days` days of summary data from GarminDB and upsert
     into garmin_daily.  Returns the number of rows written.
+
+    Both GarminDB files are ATTACHed to health.db so the whole upsert runs
+    as a single INSERT ... SELECT inside SQLite.
     """
     since = (date.today() - timedelta(days=days)).isoformat()
     now   = datetime.now(timezone.utc).isoformat()
 
-    # -- read from garmin_summary.db -----------------------------------------
-    rows_written = 0
-    with _garmin_conn(GARMIN_SUMMARY_DB) as gsrc:
-        summary_rows = gsrc.execute(
-            """
-            SELECT
-                day,
-                steps,
-                rhr_avg,
-                hr_avg,
-                stress_avg,
-                sleep_avg,
-                rem_sleep_avg,
-                calories_active_avg
-            FROM days_summary
-            WHERE day >= ?
-            ORDER BY day
-            """,
-            (since,),
-        ).fetchall()
-
-    if not summary_rows:
-        print(f"No GarminDB data found since {since}.")
-        return 0
-
-    # -- read sleep detail from garmin.db (if available) --------------------
-    # garmin.db.sleep has per-day total_sleep / deep_sleep / rem_sleep
-    sleep_by_day: dict = {}
+    conn = _health_conn()
     try:
-        with _garmin_conn(GARMIN_MAIN_DB) as gmain:
-            for row in gmain.execute(
-                "SELECT day, total_sleep, rem_sleep FROM sleep WHERE day >= ?",
-                (since,),
-            ).fetchall():
-                sleep_by_day[row["day"]] = row
-    except FileNotFoundError:
-        pass  # garmin.db is optional
-
-    # -- upsert into health.db -----------------------------------------------
-    with _health_conn() as hdst:
-        # Ensure table exists (in case the CLI hasn't been run yet)
-        hdst.execute("""
-            CREATE TABLE IF NOT EXISTS garmin_daily (
-                day             TEXT PRIMARY KEY,
-                steps           INTEGER,
-                rhr_avg         REAL,
-                hr_avg          REAL,
-                stress_avg      INTEGER,
-                sleep_total_sec INTEGER,
-                sleep_rem_sec   INTEGER,
-                calories_active INTEGER,
-                synced_at       TEXT NOT NULL
+        conn.execute("ATTACH DATABASE ? AS gsum", (str(_require(GARMIN_SUMMARY_DB)),))
+
+        # garmin.db.sleep has per-day total_sleep / deep_sleep / rem_sleep
+        if GARMIN_MAIN_DB.exists():
+            conn.execute("ATTACH DATABASE ? AS gmain", (str(GARMIN_MAIN_DB),))
+            upsert = _UPSERT_SQL.format(
+                sleep_total="CASE WHEN m.day IS NOT NULL THEN sleep_to_sec(m.total_sleep) "
+                            "ELSE sleep_to_sec(s.sleep_avg) END",
+                sleep_rem="CASE WHEN m.day IS NOT NULL THEN sleep_to_sec(m.rem_sleep) "
+                          "ELSE sleep_to_sec(s.rem_sleep_avg) END",
+                join="LEFT JOIN gmain.sleep m ON m.day = s.day",
+            )
+        else:
+            # garmin.db is optional
+            upsert = _UPSERT_SQL.format(
+                sleep_total="sleep_to_sec(s.sleep_avg)",
+                sleep_rem="sleep_to_sec(s.rem_sleep_avg)",
+                join="",
             )
-        """)
 
-        for row in summary_rows:
-            day = row["day"]
+        with conn:
+            # Ensure table exists (in case the CLI hasn't been run yet)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS garmin_daily (
+                    day             TEXT PRIMARY KEY,
+                    steps           INTEGER,
+                    rhr_avg         REAL,
+                    hr_avg          REAL,
+                    stress_avg      INTEGER,
+                    sleep_total_sec INTEGER,
+                    sleep_rem_sec   INTEGER,
+                    calories_active INTEGER,
+                    synced_at       TEXT NOT NULL
+                )
+            """)
+            rows_written = conn.execute(upsert, (now, since)).rowcount
 
-            # Prefer detailed sleep from garmin.db, fall back to summary avg
-            if day in sleep_by_day:
-                sleep_total_sec = _time_str_to_seconds(sleep_by_day[day]["total_sleep"])
-                sleep_rem_sec   = _time_str_to_seconds(sleep_by_day[day]["rem_sleep"])
-            else:
-                sleep_total_sec = _time_str_to_seconds(row["sleep_avg"])
-                sleep_rem_sec   = _time_str_to_seconds(row["rem_sleep_avg"])
+        if not rows_written:
+            print(f"No GarminDB data found since {since}.")
+            return 0
 
-            hdst.execute(
+        if verbose:
+            out = []
+            for day, steps, rhr_avg, stress_avg, sleep_total_sec in conn.execute(
                 """
-                INSERT INTO garmin_daily
-                    (day, steps, rhr_avg, hr_avg, stress_avg,
-                     sleep_total_sec, sleep_rem_sec, calories_active, synced_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(day) DO UPDATE SET
-                    steps           = excluded.steps,
-                    rhr_avg         = excluded.rhr_avg,
-                    hr_avg          = excluded.hr_avg,
-                    stress_avg      = excluded.stress_avg,
-                    sleep_total_sec = excluded.sleep_total_sec,
-                    sleep_rem_sec   = excluded.sleep_rem_sec,
-                    calories_active = excluded.calories_active,
-                    synced_at       = excluded.synced_at
+                SELECT day, steps, rhr_avg, stress_avg, sleep_total_sec
+                FROM garmin_daily
+                WHERE day >= ? AND synced_at = ?
+                ORDER BY day
                 """,
-                (
-                    day,
-                    row["steps"],
-                    row["rhr_avg"],
-                    row["hr_avg"],
-                    row["stress_avg"],
-                    sleep_total_sec,
-                    sleep_rem_sec,
-                    row["calories_active_avg"],
-                    now,
-                ),
-            )
-            rows_written += 1
-
-            if verbose:
+                (since, now),
+            ):
                 sleep_h = sleep_total_sec // 3600
                 sleep_m = (sleep_total_sec % 3600) // 60
-                print(
-                    f"  {day}  steps={row['steps'] or '-':>6}  "
-                    f"rhr={row['rhr_avg'] or '-'}  "
-                    f"stress={row['stress_avg'] or '-':>3}  "
-                    f"sleep={sleep_h}h{sleep_m:02d}m"
+                out.append(
+                    f"  {day}  steps={steps or '-':>6}  "
+                    f"rhr={rhr_avg or '-'}  "
+                    f"stress={stress_avg or '-':>3}  "
+                    f"sleep={sleep_h}h{sleep_m:02d}m\n"
                 )
+            sys.stdout.write("".join(out))
+    finally:
+        conn.close()
 
     return rows_written
 